@@ -7,8 +7,12 @@
 # This work is licensed under the terms of the MIT license.
 # For a copy, see <https://opensource.org/licenses/MIT>.
 
+# 导入并发模块，用于在后台线程中执行阻塞的 CARLA 请求，与本地的文档生成工作重叠
+import concurrent.futures
 # 导入全局模块，用于文件路径的匹配，通过通配符等方式查找符合特定模式的文件路径列表
 import glob
+# 导入运算符模块，使用其中由 C 实现的 itemgetter 作为排序键，比 Python 的 lambda 更快
+import operator
 # 导入操作系统接口模块，用于获取操作系统类型（如 'nt' 表示 Windows，'posix' 表示 Linux 等）、操作文件和目录等与操作系统相关的功能
 import os
 # 导入系统特定的参数和功能模块，可用于获取 Python 解释器相关的信息，如版本号等
@@ -41,12 +45,13 @@ import carla
 COLOR_LIST = '#498efc'
 
 # 定义一个函数，用于将元素列表用指定的分隔符连接成一个字符串，默认分隔符为空字符串，例如输入 ['a', 'b', 'c']，返回 'abc'；若指定分隔符为 ','，则返回 'a,b,c'
+# 仅在需要真正拼接序列时使用，下面的小型格式化函数直接使用 f-string，避免每次调用都创建临时列表
 def join(elem, separator=''):
     return separator.join(elem)
 
 # 定义一个函数，用于给文本添加颜色，通过将文本包裹在 HTML 的 <font> 标签中，并设置 color 属性为指定的颜色值来实现文本颜色的改变，返回添加颜色后的文本（以HTML格式表示）
 def color(col, buf):
-    return join(['<font color="', col, '">', buf, '</font>'])
+    return f'<font color="{col}">{buf}</font>'
 
 # 定义一个函数，用于检查字典中是否包含指定的键和值，返回布尔值，表示是否满足条件
 def valid_dic_val(dic, value):
@@ -54,34 +59,42 @@ def valid_dic_val(dic, value):
 
 # 定义一个函数，用于将文本转换为斜体，通过在文本前后添加 HTML 中的 <i>（或 Markdown 中的 _）标签来实现斜体样式，返回斜体格式的文本（以HTML或类似格式表示）
 def italic(buf):
-    return join(['_', buf, '_'])
+    return f'_{buf}_'
 
 # 定义一个函数，用于将文本转换为粗体，通过在文本前后添加 HTML 中的 <b>（或 Markdown 中的 **）标签来实现粗体样式，返回粗体格式的文本（以HTML或类似格式表示）
 def bold(buf):
-    return join(['**', buf, '**'])
+    return f'**{buf}**'
 
 # 定义一个函数，用于将文本用括号括起来，返回添加括号后的文本
 def parentheses(buf):
-    return join(['(', buf, ')'])
+    return f'({buf})'
 
 # 定义一个函数，用于将文本转换为下标，通过将文本包裹在 HTML 的 <sub> 标签中来实现下标样式，返回下标格式的文本（以HTML格式表示）
 def sub(buf):
-    return join(['<sub>', buf, '</sub>'])
+    return f'<sub>{buf}</sub>'
 
 # 定义一个函数，用于将文本转换为代码格式，通过在文本前后添加 HTML 中的 <code>（或 Markdown 中的 `）标签来实现代码样式，返回代码格式的文本（以HTML或类似格式表示）
 def code(buf):
-    return join(['`', buf, '`'])
+    return f'`{buf}`'
 
-# 定义一个MarkdownFile类，用于处理Markdown文档的生成，内部通过维护一个字符串来逐步构建文档内容，并管理列表相关的格式（如列表深度等）
+# 定义一个函数，用于一次性生成蓝图属性列表中的一整行（缩进、属性 ID、类型以及可选的可修改标记），
+# 等价于依次调用 list_push(code(...))、text(...)、list_popn()，但只分配并追加一个字符串，用于最内层的属性循环
+def _fmt_attr_row(indent, attr_id, attr_type, is_modifiable):
+    modifiable = ' <sub>_- Modifiable_</sub>' if is_modifiable else ''
+    return f'{indent}- `{attr_id}` (_{attr_type}_){modifiable}\n'
+
+# 定义一个MarkdownFile类，用于处理Markdown文档的生成，内部通过维护一个字符串片段列表来逐步构建文档内容，并管理列表相关的格式（如列表深度等）
 class MarkdownFile:
     def __init__(self):
-        self._data = ""  # 用于存储Markdown文档内容的字符串，初始为空
+        self._chunks = []  # 用于存储Markdown文档内容的字符串片段列表，追加为均摊 O(1)，在 data() 中一次性拼接，避免反复复制整个文档
         self._list_depth = 0  # 用于记录当前列表的深度，初始为 0，表示没有处于列表层级中
+        self._indents = tuple('    ' * i for i in range(16))  # 预先生成各级列表深度对应的缩进字符串，避免每行都重新做字符串乘法
         self.endl = '  \n'  # 定义一个换行符，用于在Markdown文档中添加换行，采用两个空格加换行的格式，符合Markdown语法要求
+        self._at_line_start = True  # 记录文档当前是否位于行首（最后追加的内容以换行符结尾），由每个追加内容的方法维护，无需回读已生成的文档
 
-    # 一个方法，返回Markdown文件的内容，即当前存储在 _data 属性中的文档内容字符串
+    # 一个方法，返回Markdown文件的内容，即将 _chunks 中存储的所有片段拼接成的文档内容字符串
     def data(self):
-        return self._data
+        return join(self._chunks)
 
     def list_push(self, buf=''):
         """
@@ -91,9 +104,11 @@ class MarkdownFile:
         然后增加列表深度，表示进入下一层列表层级。
         """
         if buf:
-            self.text(join([
-                '    ' * self._list_depth if self._list_depth!= 0 else '', '- ', buf]))
+            self.text(f'{self._indents[self._list_depth]}- {buf}')
         self._list_depth = (self._list_depth + 1)
+        if self._list_depth >= len(self._indents):
+            # 列表深度超出预先生成的范围时，按需追加新的缩进字符串
+            self._indents += ('    ' * self._list_depth,)
 
     def list_pushn(self, buf):
         """
@@ -110,52 +125,54 @@ class MarkdownFile:
 
     def list_popn(self):
         """
-        先执行 list_pop 操作减少列表深度，然后在文档内容字符串中添加换行符，用于在文档中体现列表层级的结束并换行。
+        先执行 list_pop 操作减少列表深度，然后在文档内容中添加换行符，用于在文档中体现列表层级的结束并换行。
         """
         self.list_pop()
-        self._data = join([self._data, '\n'])
+        self._chunks.append('\n')
+        self._at_line_start = True
 
     def list_depth(self):
         """
-        根据当前列表深度返回相应的缩进字符串，如果文档内容字符串的最后一个字符不是换行符或者列表深度为 0，则返回空字符串，
+        根据当前列表深度返回相应的缩进字符串，如果文档当前不在行首或者列表深度为 0，则返回空字符串，
         否则返回根据列表深度生成的缩进字符串（由多个空格组成，用于在文档中体现列表的层级缩进格式）。
         """
-        if self._data.strip()[-1:]!= '\n' or self._list_depth == 0:
-            return ''
-        return join(['    ' * self._list_depth])
+        return self._indents[self._list_depth] if self._at_line_start and self._list_depth else ''
 
     def text(self, buf):
         """
-        将传入的文本内容添加到文档内容字符串中，用于向文档中添加普通文本内容（非列表、标题等特定格式的文本）。
+        将传入的文本内容添加到文档内容中，用于向文档中添加普通文本内容（非列表、标题等特定格式的文本）。
         """
-        self._data = join([self._data, buf])
+        self._chunks.append(buf)
+        self._at_line_start = buf.endswith('\n')
 
     def textn(self, buf):
         """
-        将传入的文本内容添加到文档内容字符串中，并根据当前列表深度添加相应的缩进，然后添加换行符，方便添加带有换行且遵循列表缩进格式的文本内容。
+        将传入的文本内容添加到文档内容中，并根据当前列表深度添加相应的缩进，然后添加换行符，方便添加带有换行且遵循列表缩进格式的文本内容。
         """
-        self._data = join([self._data, self.list_depth(), buf, self.endl])
+        self._chunks.extend((self.list_depth(), buf, self.endl))
+        self._at_line_start = True
 
     def not_title(self, buf):
         """
-        在文档内容字符串中添加非标题文本，先添加换行符，再根据当前列表深度添加相应的缩进，然后添加以 '#' 开头的文本内容（表示普通段落文本，非标题格式），最后再添加换行符。
+        在文档内容中添加非标题文本，先添加换行符，再根据当前列表深度添加相应的缩进，然后添加以 '#' 开头的文本内容（表示普通段落文本，非标题格式），最后再添加换行符。
         """
-        self._data = join([
-            self._data, '\n', self.list_depth(), '#', buf, '\n'])
+        self._chunks.extend(('\n', self.list_depth(), '#', buf, '\n'))
+        self._at_line_start = True
 
     def title(self, strongness, buf):
         """
-        在文档内容字符串中添加标题文本，标题的级别由 strongness 参数决定（'#' 的数量表示标题级别，例如 3 个 '#' 表示三级标题）。
+        在文档内容中添加标题文本，标题的级别由 strongness 参数决定（'#' 的数量表示标题级别，例如 3 个 '#' 表示三级标题）。
         先添加换行符，再根据当前列表深度添加相应的缩进，然后添加对应数量的 '#' 符号、空格以及标题文本内容，最后再添加换行符。
         """
-        self._data = join([
-            self._data, '\n', self.list_depth(), '#' * strongness, ' ', buf, '\n'])
+        self._chunks.extend(('\n', self.list_depth(), '#' * strongness, ' ', buf, '\n'))
+        self._at_line_start = True
 
     def new_line(self):
         """
-        在文档内容字符串中添加新行，通过添加预定义的换行符（self.endl）来实现。
+        在文档内容中添加新行，通过添加预定义的换行符（self.endl）来实现。
         """
-        self._data = join([self._data, self.endl])
+        self._chunks.append(self.endl)
+        self._at_line_start = True
 
     def code_block(self, buf, language=''):
         """
@@ -164,7 +181,8 @@ class MarkdownFile:
         返回一个包含代码块格式的字符串，由三个反引号（```）开头，后面可选地跟上编程语言名称（用于语法高亮等，若不指定则为空），
         接着换行添加根据当前列表深度生成的缩进、代码内容、同样缩进的换行以及三个反引号结尾并换行，形成符合Markdown语法的代码块格式。
         """
-        return join(['```', language, '\n', self.list_depth(), buf, '\n', self.list_depth(), '```\n'])
+        depth = self.list_depth()
+        return f'```{language}\n{depth}{buf}\n{depth}```\n'
 
 
 def generate_pb_docs():
@@ -172,59 +190,58 @@ def generate_pb_docs():
 
     print('Generating API blueprint documentation...')
     client = carla.Client('127.0.0.1', 2000)  # 创建CARLA客户端连接，指定连接的主机地址为本地（127.0.0.1）和端口号为 2000，用于与CARLA模拟器进行通信
-    client.set_timeout(2.0)  # 设置客户端超时时间为 2 秒，即如果在 2 秒内没有收到服务器响应，则认为操作超时
+    client.set_timeout(10.0)  # 设置客户端超时时间为 10 秒，即如果在 10 秒内没有收到服务器响应，则认为操作超时，留出余量避免网络抖动导致脚本中止
     world = client.get_world()  # 获取CARLA世界对象，代表模拟器中的整个虚拟世界场景，通过该对象可以进一步获取世界中的各种实体、资源等信息
 
+    with concurrent.futures.ThreadPoolExecutor(max_workers=1) as executor:
+        # 获取世界中所有的蓝图对象列表，通过调用世界对象的 get_blueprint_library 方法获取蓝图库，再使用 filter 方法筛选出所有符合 '*'（表示全部）条件的蓝图
+        # 该调用是阻塞的 RPC 并可能传输大量数据，只请求一次，并放到后台线程中执行，与下面生成文档开头静态内容的本地工作重叠
+        library_future = executor.submit(
+            lambda: list(world.get_blueprint_library().filter('*')))  # Returns list of all blueprints
+
+        # 生成Markdown文档
+        md = MarkdownFile()
+        md.not_title('Blueprint Library')  # 添加非标题文本，作为文档中关于蓝图库的说明部分开头
+        md.textn(
+            "The Blueprint Library ([`carla.BlueprintLibrary`](../python_api/#carlablueprintlibrary-class)) " +
+            "is a summary of all [`carla.ActorBlueprint`](../python_api/#carla.ActorBlueprint) " +
+            "and its attributes ([`carla.ActorAttribute`](../python_api/#carla.ActorAttribute)) " +
+            "available to the user in CARLA.")
+        # 添加一段关于蓝图库的详细描述文本，包含对相关类的链接引用（可能用于指向文档中其他部分或者外部文档中的对应类说明），介绍蓝图库是包含各种蓝图及其属性的汇总，可供用户在CARLA中使用
+
+        md.textn("\nHere is an example code for printing all actor blueprints and their attributes:")
+        # 添加提示文本，说明接下来要展示用于打印所有演员蓝图及其属性的示例代码
+        md.textn(md.code_block("blueprints = [bp for bp in world.get_blueprint_library().filter('*')]\n"
+                               "for blueprint in blueprints:\n"
+                               "   print(blueprint.id)\n"
+                               "   for attr in blueprint:\n"
+                               "       print('  - {}'.format(attr))", "py"))
+        # 添加示例代码块，代码内容是通过循环遍历获取到的所有蓝图并打印它们的 ID 以及每个蓝图的属性，指定代码块的语言为 Python（用于语法高亮等展示效果）
+        md.textn("Check out the [introduction to blueprints](core_actors.md).")
+        # 添加提示文本，引导查看关于蓝图的介绍文档（可能是另一个 Markdown 文件 core_actors.md）
+
+        library = library_future.result()  # 等待后台获取蓝图库完成，连接失败时这里会重新抛出 RuntimeError
+
     bp_dict = {}  # 初始化一个字典，用于存储蓝图信息，字典的键将是蓝图类型，值是对应的蓝图相关信息列表
-    blueprints = [bp for bp in world.get_blueprint_library().filter('*')]  # Returns list of all blueprints
-    # 获取世界中所有的蓝图对象列表，通过调用世界对象的 get_blueprint_library 方法获取蓝图库，再使用 filter 方法筛选出所有符合 '*'（表示全部）条件的蓝图
-    blueprint_ids = [bp.id for bp in world.get_blueprint_library().filter('*')]  # Returns list of all blueprint ids
-    # 获取所有蓝图的唯一标识符（ID）列表，通过遍历前面获取的所有蓝图对象，提取它们的 id 属性来得到
-
-    # 根据蓝图类型分类蓝图，Creates a dict key = walker, static, prop, vehicle, sensor, controller; value = [bp_id, blueprint]
-    for bp_id in sorted(blueprint_ids):
-        bp_type = bp_id.split('.')[0]
-        value = []
-        for bp in blueprints:
-            if bp.id == bp_id:
-                value = [bp_id, bp]
-        if bp_type in bp_dict:
-            bp_dict[bp_type].append(value)
-        else:
-            bp_dict[bp_type] = [value]
-
-    # 生成Markdown文档
-    md = MarkdownFile()
-    md.not_title('Blueprint Library')  # 添加非标题文本，作为文档中关于蓝图库的说明部分开头
-    md.textn(
-        "The Blueprint Library ([`carla.BlueprintLibrary`](../python_api/#carlablueprintlibrary-class)) " +
-        "is a summary of all [`carla.ActorBlueprint`](../python_api/#carla.ActorBlueprint) " +
-        "and its attributes ([`carla.ActorAttribute`](../python_api/#carla.ActorAttribute)) " +
-        "available to the user in CARLA.")
-    # 添加一段关于蓝图库的详细描述文本，包含对相关类的链接引用（可能用于指向文档中其他部分或者外部文档中的对应类说明），介绍蓝图库是包含各种蓝图及其属性的汇总，可供用户在CARLA中使用
-
-    md.textn("\nHere is an example code for printing all actor blueprints and their attributes:")
-    # 添加提示文本，说明接下来要展示用于打印所有演员蓝图及其属性的示例代码
-    md.textn(md.code_block("blueprints = [bp for bp in world.get_blueprint_library().filter('*')]\n"
-                           "for blueprint in blueprints:\n"
-                           "   print(blueprint.id)\n"
-                           "   for attr in blueprint:\n"
-                           "       print('  - {}'.format(attr))", "py"))
-    # 添加示例代码块，代码内容是通过循环遍历获取到的所有蓝图并打印它们的 ID 以及每个蓝图的属性，指定代码块的语言为 Python（用于语法高亮等展示效果）
-    md.textn("Check out the [introduction to blueprints](core_actors.md).")
-    # 添加提示文本，引导查看关于蓝图的介绍文档（可能是另一个 Markdown 文件 core_actors.md）
-
-    for key, value in bp_dict.items():  # bp types, bp's
+    # 根据蓝图类型分类蓝图，Creates a dict key = walker, static, prop, vehicle, sensor, controller; value = (bp_id, blueprint)
+    # 只遍历一次蓝图库，直接以 bp.id 建立索引，无需再为每个 ID 重新扫描整个蓝图列表
+    for bp in library:
+        bp_dict.setdefault(bp.id.split('.')[0], []).append((bp.id, bp))
+    for bucket in bp_dict.values():
+        bucket.sort(key=lambda x: x[0])  # 每种类型的蓝图只按 ID 排序一次
+
+    for key, value in sorted(bp_dict.items()):  # bp types, bp's
         md.title(3, key)  # 添加三级标题，标题文本为当前蓝图类型（如 'walker'、'vehicle' 等），用于对不同类型的蓝图进行分组展示
-        for bp in sorted(value):  # Value = bp[0]= name bp[1]= blueprint
+        for bp in value:  # Value = bp[0]= name bp[1]= blueprint，已按 ID 排好序
             md.list_pushn(bold(color(COLOR_LIST, bp[0])))  # 添加列表项，将蓝图名称设置为加粗且带有指定颜色的样式，突出显示蓝图名称，并添加换行
             md.list_push(bold('Attributes:') + '\n')  # 添加列表项，文本为加粗的 'Attributes:'，并添加换行，用于引出蓝图属性的展示
-            for attr in sorted(bp[1], key=lambda x: x.id):  # 遍历蓝图属性，按照属性的 ID 进行排序
-                md.list_push(code(attr.id))  # 将属性 ID 以代码格式添加为列表项，突出显示属性的标识符
-                md.text(' ' + parentheses(italic(str(attr.type))))  # 在属性 ID 后添加属性类型信息，设置为斜体并加上括号，用于展示属性类型详情
-                if attr.is_modifiable:
-                    md.text(' ' + sub(italic('- Modifiable')))  # 如果属性是可修改的，则添加一个下标格式的 '- Modifiable' 文本，用于标识该属性可被修改
-                md.list_popn()  # 结束当前属性的列表项展示，添加换行
+            # 每个属性的 id、type、is_modifiable 都需要跨越 C++/Python 边界读取，这里一次性读取成普通元组，再按属性 ID 排序
+            attrs = [(attr.id, str(attr.type), attr.is_modifiable) for attr in bp[1]]
+            attrs.sort(key=operator.itemgetter(0))
+            indent = md.list_depth()  # 所有属性行都位于同一列表层级，缩进只需获取一次
+            for attr_id, attr_type, is_modifiable in attrs:  # 遍历蓝图属性，按照属性的 ID 进行排序
+                # 以代码格式展示属性 ID，后面跟上斜体并加括号的属性类型，若属性可修改则再添加下标格式的 '- Modifiable' 标记，整行一次性追加
+                md.text(_fmt_attr_row(indent, attr_id, attr_type, is_modifiable))
             md.list_pop()  # 结束属性列表的展示，回到上一层列表层级
             md.list_pop()  # 再结束蓝图名称这一层列表的展示，回到更上一层列表层级
         md.list_pop()  # 结束当前蓝图类型下所有蓝图相关内容的展示，回到再上一层列表层级
@@ -243,8 +260,8 @@ def main():
         # We don't provide an error to prvent Travis checks failing
         sys.exit(0)  # 为了避免Travis检查失败（可能是在持续集成环境中的特定要求），遇到运行时错误则直接退出程序
 
-    with open(os.path.join(script_path, '../../Docs/bp_library.md'), 'w') as md_file:  # 保存Markdown文档，打开指定路径下的文件（相对于脚本所在目录的上级目录的 Docs 文件夹中的 bp_library.md 文件），以写入模式打开
-        md_file.write(docs)  # 将生成的文档内容写入到打开的文件中
+    with open(os.path.join(script_path, '../../Docs/bp_library.md'), 'w', buffering=2**20) as md_file:  # 保存Markdown文档，打开指定路径下的文件（相对于脚本所在目录的上级目录的 Docs 文件夹中的 bp_library.md 文件），以写入模式打开，并使用 1 MiB 的缓冲区
+        md_file.write(docs)  # 将拼接好的完整文档一次性写入到打开的文件中，避免多次小规模写入
     print("Done!")  # 完成提示，表示文档生成并保存成功
 
 if __name__ == '__main__':